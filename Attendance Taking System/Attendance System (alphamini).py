@@ -2,6 +2,12 @@ import asyncio
 import logging
 import os
 import shutil
+
+try:
+    import uvloop  # Faster C event loop (not available on Windows)
+except ImportError:
+    uvloop = None
+
 import mini.mini_sdk as MiniSdk
 from mini.dns.dns_browser import WiFiDevice
 from mini.apis.api_sense import TakePicture, TakePictureRequest
@@ -114,4 +120,7 @@ async def main():
 # Entry point
 # -----------------------------
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
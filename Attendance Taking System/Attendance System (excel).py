@@ -1,46 +1,130 @@
-pip install pyzbar pillow openpyxl
+# pip install zxing-cpp pillow openpyxl watchdog
 
+import csv
 import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from PIL import Image
-from pyzbar.pyzbar import decode
+import zxingcpp
 import openpyxl
 from openpyxl import Workbook
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
 
 # ===========================
 # Configuration
 # ===========================
-EXCEL_FILE = "attendance_log.xlsx"
+# The CSV log is the source of truth: make any manual corrections there.
+# The Excel export is regenerated from it at the end of every session.
+CSV_FILE = "attendance_log.csv"             # Append-only log written on every scan
+EXCEL_FILE = "attendance_export.xlsx"       # Read-only export, overwritten each session
+LEGACY_EXCEL_FILE = "attendance_log.xlsx"   # Old Excel log, imported once and never written
+HEADERS = ["Student ID", "Name", "Date", "Time", "Status"]
 IMAGES_FOLDER = "received_photos"  # Folder where robot saves photos
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+QR_MAX_SIZE = (1024, 1024)  # Larger photos are downscaled before decoding
+FILE_SETTLE_SECONDS = 0.5   # New photo's size must hold steady this long before reading
+FILE_SETTLE_TIMEOUT = 10    # Give up waiting for a photo to finish writing after this
+RECENT_FILE_SECONDS = 5     # At startup, only photos modified this recently may still be syncing
+READ_RETRIES = 3            # Re-read an unreadable photo this many times before giving up
+READ_RETRY_DELAY = 0.5      # First retry delay in seconds, doubled on each retry
 
 
 # ===========================
-# Excel Setup Functions
+# Log Setup Functions
 # ===========================
-def initialize_excel():
-    """Create Excel file if it doesn't exist with proper headers"""
-    if not os.path.exists(EXCEL_FILE):
+def initialize_log():
+    """Create CSV log if it doesn't exist, carrying over records from the old Excel log"""
+    if os.path.exists(CSV_FILE):
+        print(f"✓ Attendance log already exists: {CSV_FILE}")
+        return
+
+    rows = []
+    if os.path.exists(LEGACY_EXCEL_FILE):
+        workbook = openpyxl.load_workbook(LEGACY_EXCEL_FILE, read_only=True)
+        rows = list(workbook.active.iter_rows(min_row=2, values_only=True))
+        workbook.close()
+
+    with open(CSV_FILE, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+
+    print(f"✓ Created new attendance log: {CSV_FILE}")
+
+    if os.path.exists(LEGACY_EXCEL_FILE):
+        print(f"ℹ Imported {len(rows)} records from {LEGACY_EXCEL_FILE}. That file is no longer updated:")
+        print(f"  current records are kept in {CSV_FILE} and exported to {EXCEL_FILE}")
+
+
+def export_to_xlsx():
+    """Regenerate the Excel export from the CSV log with proper headers"""
+    try:
         workbook = Workbook()
         sheet = workbook.active
         sheet.title = "Attendance"
 
-        # Create headers
-        headers = ["Student ID", "Name", "Date", "Time", "Status"]
-        sheet.append(headers)
+        with open(CSV_FILE, newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if row:  # Skip blank lines left by manual edits
+                    sheet.append(row)
 
         # Format headers (bold)
         for cell in sheet[1]:
             cell.font = openpyxl.styles.Font(bold=True)
 
         workbook.save(EXCEL_FILE)
-        print(f"✓ Created new Excel file: {EXCEL_FILE}")
-    else:
-        print(f"✓ Excel file already exists: {EXCEL_FILE}")
+        print(f"✓ Exported attendance to Excel file: {EXCEL_FILE}")
+
+    except Exception as e:
+        print(f"✗ Error exporting to Excel: {e}")
 
 
 # ===========================
 # QR Code Decoding Functions
 # ===========================
+def open_image(image_path):
+    """
+    Open an image downscaled to grayscale for decoding
+
+    A photo that is still being written or is locked by another process
+    fails to read with OSError (including PIL's "image file is truncated"),
+    so the read is retried with a growing delay before giving up.
+
+    Args:
+        image_path: Path to the image file
+
+    Returns:
+        Grayscale PIL image no larger than QR_MAX_SIZE
+
+    Raises:
+        OSError: If the image still can't be read after READ_RETRIES retries
+    """
+    for attempt in range(READ_RETRIES + 1):
+        try:
+            with Image.open(image_path) as img:
+                # Scan cost grows with pixel count: shrink phone-sized photos and
+                # drop colour, which the QR scanner doesn't use. For JPEGs, draft()
+                # makes libjpeg do both during decoding (no-op for other formats)
+                img.draft("L", QR_MAX_SIZE)
+                img.thumbnail(QR_MAX_SIZE, Image.BILINEAR)
+                return img.convert("L")
+
+        except FileNotFoundError:
+            raise
+
+        except OSError as e:
+            if attempt == READ_RETRIES:
+                raise
+            delay = READ_RETRY_DELAY * 2 ** attempt
+            print(f"⚠ Could not read {image_path} yet ({e}), retrying in {delay:g}s")
+            time.sleep(delay)
+
+
 def decode_qr_from_image(image_path):
     """
     Decode QR code from image file
@@ -53,22 +137,22 @@ def decode_qr_from_image(image_path):
     """
     try:
         # Open image using PIL
-        img = Image.open(image_path)
+        img = open_image(image_path)
 
         # Decode QR codes in the image
-        decoded_objects = decode(img)
+        results = zxingcpp.read_barcodes(img, formats=zxingcpp.BarcodeFormat.QRCode)
 
-        if decoded_objects:
+        if results:
             # Get the first QR code's data
-            qr_data = decoded_objects[0].data.decode('utf-8')
-            print(f"✓ QR Code decoded: {qr_data}")
+            qr_data = results[0].text
+            print(f"✓ QR Code decoded: {qr_data} (from {image_path})")
             return qr_data
         else:
-            print("✗ No QR code found in image")
+            print(f"✗ No QR code found in image: {image_path}")
             return None
 
     except Exception as e:
-        print(f"✗ Error decoding QR code: {e}")
+        print(f"✗ Error decoding QR code in {image_path}: {e}")
         return None
 
 
@@ -114,55 +198,97 @@ def parse_qr_data(qr_data):
 # ===========================
 # Logging Functions
 # ===========================
-def log_attendance(student_id, name, status="Present"):
+class AttendanceLog:
     """
-    Log attendance record to Excel file
+    Append-only attendance log kept open for the whole session
+
+    Existing (student_id, date) pairs are indexed in memory on open, so
+    each scan is a dict lookup plus a single appended CSV row instead of
+    rebuilding the whole Excel file. Safe to call from several threads.
 
     Args:
-        student_id: Student ID from QR code
-        name: Student name from QR code
-        status: Attendance status (default: "Present")
+        csv_file: Path to the attendance CSV log
     """
-    try:
-        # Load workbook
-        workbook = openpyxl.load_workbook(EXCEL_FILE)
-        sheet = workbook.active
-
-        # Get current date and time
-        now = datetime.now()
-        date_str = now.strftime("%Y-%m-%d")
-        time_str = now.strftime("%H:%M:%S")
 
-        # Check for duplicate entry (same student, same day)
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            if row[0] == student_id and row[2] == date_str:
-                print(f"⚠ Duplicate: {student_id} already logged today at {row[3]}")
-                workbook.close()
-                return False
-
-        # Append new record
-        new_row = [student_id, name, date_str, time_str, status]
-        sheet.append(new_row)
-
-        # Save workbook
-        workbook.save(EXCEL_FILE)
-        print(f"✓ Logged: {student_id} - {name} at {time_str}")
-        return True
-
-    except Exception as e:
-        print(f"✗ Error logging attendance: {e}")
-        return False
+    def __init__(self, csv_file):
+        # Index existing records: (student_id, date) -> time logged
+        self._seen = {}
+        with open(csv_file, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)  # Skip headers
+            for row in reader:
+                # Skip blank or incomplete rows left by manual edits
+                if len(row) < 4:
+                    continue
+                self._seen[(row[0], row[2])] = row[3]
+
+        self._file = open(csv_file, "a", newline="", encoding="utf-8")
+
+        # A hand-edited file may lack a final newline; don't join the next row onto it
+        if os.path.getsize(csv_file) > 0:
+            with open(csv_file, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) not in (b"\n", b"\r"):
+                    self._file.write("\r\n")
+        self._writer = csv.writer(self._file)
+        self._lock = threading.Lock()
+
+    def log_attendance(self, student_id, name, status="Present", image_path=None):
+        """
+        Append attendance record to the CSV log
+
+        Args:
+            student_id: Student ID from QR code
+            name: Student name from QR code
+            status: Attendance status (default: "Present")
+            image_path: Photo the QR code came from, shown in messages
+
+        Returns:
+            True if logged, False if duplicate or on error
+        """
+        source = f" (from {image_path})" if image_path else ""
+
+        try:
+            # Get current date and time
+            now = datetime.now()
+            date_str = now.strftime("%Y-%m-%d")
+            time_str = now.strftime("%H:%M:%S")
+
+            with self._lock:
+                # Check for duplicate entry (same student, same day)
+                key = (student_id, date_str)
+                if key in self._seen:
+                    print(f"⚠ Duplicate: {student_id} already logged today at {self._seen[key]}{source}")
+                    return False
+
+                # Append new record
+                new_row = [student_id, name, date_str, time_str, status]
+                self._writer.writerow(new_row)
+                self._file.flush()
+                self._seen[key] = time_str
+
+            print(f"✓ Logged: {student_id} - {name} at {time_str}{source}")
+            return True
+
+        except Exception as e:
+            print(f"✗ Error logging attendance{source}: {e}")
+            return False
+
+    def close(self):
+        """Close the CSV log"""
+        self._file.close()
 
 
 # ===========================
 # Main Processing Function
 # ===========================
-def process_qr_image(image_path):
+def process_qr_image(image_path, attendance_log):
     """
     Complete workflow: decode QR code and log attendance
 
     Args:
         image_path: Path to the QR code image
+        attendance_log: AttendanceLog to record the student in
 
     Returns:
         True if successful, False otherwise
@@ -179,54 +305,190 @@ def process_qr_image(image_path):
     if not student_info:
         return False
 
-    # Step 3: Log to Excel
-    success = log_attendance(
+    # Step 3: Log attendance
+    success = attendance_log.log_attendance(
         student_info['student_id'],
-        student_info['name']
+        student_info['name'],
+        image_path=image_path
     )
 
     return success
 
 
 # ===========================
-# Monitoring Function
+# Monitoring Functions
 # ===========================
-def monitor_folder(folder_path):
+def wait_for_file_complete(path):
+    """
+    Wait until a file's size stops changing, i.e. it has finished being written
+
+    Args:
+        path: Path to the file being written
+
+    Returns:
+        True once the size is stable, False if the file is gone or the wait timed out
+    """
+    deadline = time.monotonic() + FILE_SETTLE_TIMEOUT
+    last_size = -1
+
+    while time.monotonic() < deadline:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+
+        if size > 0 and size == last_size:
+            return True
+
+        last_size = size
+        time.sleep(FILE_SETTLE_SECONDS)
+
+    return False
+
+
+def process_new_image(image_path, attendance_log):
+    """
+    Process an image that may still be being written
+
+    Args:
+        image_path: Path to the new image
+        attendance_log: AttendanceLog to record the student in
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if not wait_for_file_complete(image_path):
+        if not os.path.exists(image_path):
+            # Removed or renamed while being written; on_moved covers renames
+            return False
+        print(f"⚠ Still being written after {FILE_SETTLE_TIMEOUT}s, trying anyway: {image_path}")
+
+    return process_qr_image(image_path, attendance_log)
+
+
+class ImageEventHandler(FileSystemEventHandler):
+    """
+    Submit image files reported by the folder observer for processing
+
+    New files are read once their size stops changing. On Linux, files
+    written in place are also picked up as soon as the writer closes them.
+    Each path is processed by at most one job at a time, so a photo that
+    raises several events is only decoded once.
+
+    Args:
+        executor: Thread pool that runs the processing
+        attendance_log: AttendanceLog to record students in
+    """
+
+    # Only the inotify backend reports files being closed after writing
+    HAS_CLOSE_EVENTS = sys.platform.startswith("linux")
+
+    def __init__(self, executor, attendance_log):
+        super().__init__()
+        self.executor = executor
+        self.attendance_log = attendance_log
+        self._in_flight = set()
+        self._in_flight_lock = threading.Lock()
+
+    def on_created(self, event):
+        # Files moved in from another folder only raise a created event
+        if not event.is_directory:
+            self.submit(process_new_image, event.src_path)
+
+    def on_closed(self, event):
+        if self.HAS_CLOSE_EVENTS and not event.is_directory:
+            self.submit(process_qr_image, event.src_path)
+
+    def on_moved(self, event):
+        # Synced files are often written under a temporary name, then renamed
+        if not event.is_directory:
+            self.submit(process_qr_image, event.dest_path)
+
+    def submit(self, process, path):
+        """
+        Queue an image for processing on the thread pool
+
+        Skipped if the same path is already queued or being processed.
+        Errors not handled inside the job are printed with a traceback
+        instead of being held silently by the returned future.
+
+        Args:
+            process: process_qr_image or process_new_image
+            path: Path to the image
+        """
+        if not path.lower().endswith(IMAGE_EXTENSIONS):
+            return
+
+        key = os.path.abspath(path)
+        with self._in_flight_lock:
+            if key in self._in_flight:
+                return
+            self._in_flight.add(key)
+
+        def on_done(future):
+            with self._in_flight_lock:
+                self._in_flight.discard(key)
+
+            if future.cancelled():
+                return
+            exc = future.exception()
+            if exc is not None:
+                print(f"✗ Unexpected error processing {path}:")
+                traceback.print_exception(type(exc), exc, exc.__traceback__)
+
+        future = self.executor.submit(process, path, self.attendance_log)
+        future.add_done_callback(on_done)
+
+
+def monitor_folder(folder_path, attendance_log):
     """
     Monitor folder for new images and process them
 
     Args:
         folder_path: Path to folder where robot saves images
+        attendance_log: AttendanceLog to record students in
     """
     if not os.path.exists(folder_path):
         os.makedirs(folder_path)
         print(f"✓ Created folder: {folder_path}")
 
-    processed_files = set()
+    # Decoding releases the GIL, so a burst of photos is decoded in parallel
+    executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+    # Watch for new images (pushed by the OS, no polling)
+    handler = ImageEventHandler(executor, attendance_log)
+    observer = Observer()
+    observer.schedule(handler, folder_path, recursive=False)
+    observer.start()
+
+    # Images already in the folder are processed once at startup. Only
+    # recently modified ones may still be mid-sync and need the settle wait;
+    # old ones go straight through so they don't hold up new scans
+    now = time.time()
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            recent = now - entry.stat().st_mtime < RECENT_FILE_SECONDS
+            handler.submit(process_new_image if recent else process_qr_image, entry.path)
 
     print(f"\n👁 Monitoring folder: {folder_path}")
     print("Press Ctrl+C to stop\n")
 
     try:
-        while True:
-            # List all image files
-            files = [f for f in os.listdir(folder_path)
-                     if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-
-            # Process new files
-            for filename in files:
-                if filename not in processed_files:
-                    image_path = os.path.join(folder_path, filename)
-                    process_qr_image(image_path)
-                    processed_files.add(filename)
-
-            # Wait before checking again
-            import time
-            time.sleep(2)
+        while observer.is_alive():
+            observer.join(1)
 
     except KeyboardInterrupt:
         print("\n\n✓ Monitoring stopped")
 
+    finally:
+        observer.stop()
+        observer.join()
+
+        # Finish queued images before the log is closed
+        executor.shutdown(wait=True)
+
 
 # ===========================
 # Main Entry Point
@@ -237,8 +499,9 @@ def main():
     print("QR Code Attendance Logging System - PC Side")
     print("=" * 50)
 
-    # Initialize Excel file
-    initialize_excel()
+    # Initialize attendance log
+    initialize_log()
+    attendance_log = AttendanceLog(CSV_FILE)
 
     # Choose mode
     print("\nSelect mode:")
@@ -247,17 +510,22 @@ def main():
 
     choice = input("\nEnter choice (1/2): ").strip()
 
-    if choice == "1":
-        # Single image mode
-        image_path = input("Enter image path: ").strip()
-        process_qr_image(image_path)
+    try:
+        if choice == "1":
+            # Single image mode
+            image_path = input("Enter image path: ").strip()
+            process_qr_image(image_path, attendance_log)
+
+        elif choice == "2":
+            # Monitoring mode
+            monitor_folder(IMAGES_FOLDER, attendance_log)
 
-    elif choice == "2":
-        # Monitoring mode
-        monitor_folder(IMAGES_FOLDER)
+        else:
+            print("✗ Invalid choice")
 
-    else:
-        print("✗ Invalid choice")
+    finally:
+        attendance_log.close()
+        export_to_xlsx()
 
 
 if __name__ == "__main__":
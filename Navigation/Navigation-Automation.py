@@ -2,6 +2,11 @@ import asyncio
 import logging
 import sys
 
+try:
+    import uvloop  # Faster C event loop (not available on Windows)
+except ImportError:
+    uvloop = None
+
 import mini.mini_sdk as MiniSdk
 from mini.dns.dns_browser import WiFiDevice
 from mini.apis.api_action import MoveRobot, MoveRobotDirection, MoveRobotResponse
@@ -101,7 +106,10 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\nProgram interrupted by user.")
     sys.exit(0)
\ No newline at end of file
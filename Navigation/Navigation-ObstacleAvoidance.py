@@ -2,6 +2,11 @@ import asyncio
 import logging
 import sys
 
+try:
+    import uvloop  # Faster C event loop (not available on Windows)
+except ImportError:
+    uvloop = None
+
 #  THE CORRECT MODULE NAME IS 'api_sence' (Confirmed)
 from mini.apis.api_sence import GetInfraredDistance, GetInfraredDistanceResponse
 
@@ -127,7 +132,10 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\nProgram interrupted by user (Ctrl+C).")
         sys.exit(0)
\ No newline at end of file